@@ -1,17 +1,39 @@
 #!/usr/bin/env python3
 """
-Abuja Car Bot - Sends 8 Abuja cars every 30 min from your Apify dataset
+Abuja Car Bot - Sends Abuja cars from your Apify dataset on an adaptive schedule
+(faster while there's a big backlog, backing off when nothing changes)
 With complete Abuja locations and working links!
 """
 
 import os
+import re
 import time
 import json
+import uuid
+import math
 import requests
-import schedule
-from datetime import datetime
-from typing import List, Dict, Any, Tuple
+from datetime import datetime, timedelta, timezone, tzinfo
+from typing import List, Dict, Any, Callable, Optional, Tuple
 from pathlib import Path
+from collections import deque
+
+try:
+    from zoneinfo import ZoneInfo
+except ImportError:
+    ZoneInfo = None
+
+# Optional: pyarrow powers the historical listing archive
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    import pyarrow.fs as pafs
+    import pyarrow.parquet as pq
+    ARCHIVE_AVAILABLE = True
+except ImportError:
+    ARCHIVE_AVAILABLE = False
+    print("⚠️ pyarrow not installed - listing archive disabled")
+    print("   To enable, add 'pyarrow' to requirements.txt")
 
 # ============================================
 # FLASK WEB SERVER FOR RENDER (IMPROVED VERSION)
@@ -55,6 +77,73 @@ try:
         except Exception as e:
             return jsonify({'status': 'error', 'message': str(e)}), 500
     
+    @web_app.route('/archive/query')
+    def archive_query():
+        """Query archived listings, e.g. /archive/query?district=Gwarinpa&distress=1&max_price=5000000&days=30"""
+        from flask import request as flask_request
+        args = flask_request.args
+        
+        def number(name, cast, default=None):
+            value = args.get(name)
+            if value in (None, ''):
+                return default
+            try:
+                number_value = cast(value)
+            except ValueError:
+                raise ValueError(f"'{name}' must be a {'whole ' if cast is int else ''}number, got '{value}'")
+            if number_value < 0:
+                raise ValueError(f"'{name}' can't be negative")
+            return number_value
+        
+        def flag(name):
+            value = args.get(name)
+            if value in (None, ''):
+                return None
+            if value.lower() in ('1', 'true', 'yes'):
+                return True
+            if value.lower() in ('0', 'false', 'no'):
+                return False
+            raise ValueError(f"'{name}' must be true or false, got '{value}'")
+        
+        try:
+            filters = dict(
+                district=args.get('district'),
+                dataset_id=args.get('dataset_id'),
+                min_price=number('min_price', float),
+                max_price=number('max_price', float),
+                days=number('days', int),
+                min_score=number('min_score', int),
+                limit=number('limit', int, default=100),
+                is_direct_seller=flag('direct'),
+                is_used=flag('used'),
+                is_cheap=flag('cheap'),
+                is_distress=flag('distress'),
+            )
+            # e.g. columns=url,price,district - only those columns are read
+            if args.get('columns'):
+                filters['columns'] = [name.strip() for name in args['columns'].split(',') if name.strip()]
+        except ValueError as e:
+            return jsonify({'status': 'error', 'message': str(e)}), 400
+        
+        if not ARCHIVE_AVAILABLE:
+            return jsonify({'status': 'disabled', 'message': 'Listing archive is disabled (pyarrow not installed)'}), 503
+        
+        try:
+            rows = query_archive(**filters)
+            return jsonify({'count': len(rows), 'results': rows}), 200
+        except ValueError as e:
+            return jsonify({'status': 'error', 'message': str(e)}), 400
+        except Exception as e:
+            return jsonify({'status': 'error', 'message': str(e)}), 500
+    
+    @web_app.route('/archive/stats')
+    def archive_stats_route():
+        """Show archive size - rows, files and partitions"""
+        try:
+            return jsonify(archive_stats()), 200
+        except Exception as e:
+            return jsonify({'status': 'error', 'message': str(e)}), 500
+    
     def is_port_open(port):
         """Check if port is already open"""
         with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
@@ -101,7 +190,7 @@ try:
     # Verify port is open
     if is_port_open(int(os.environ.get('PORT', 10000))):
         print("✅ Flask web server confirmed running")
-        print("🌐 Web routes: / (home), /health, /status")
+        print("🌐 Web routes: / (home), /health, /status, /archive/query, /archive/stats")
     else:
         print("⚠️ Flask may not be running properly. Check logs above.")
     
@@ -121,12 +210,36 @@ TELEGRAM_CHAT_ID = os.environ.get('TELEGRAM_CHAT_ID')
 # Dataset ID from environment (you set this as DATASET_ID in Render)
 APIFY_DATASET_ID = os.environ.get('DATASET_ID')
 
-# How many cars to send per update
+# How many cars to put in one Telegram message
 MAX_CARS_PER_MESSAGE = 8
 
+# Adaptive schedule - the bot checks more often while there's a backlog
+# and backs off (doubling each time) while nothing changes
+MIN_INTERVAL_MINUTES = 10
+BASE_INTERVAL_MINUTES = 30
+MAX_INTERVAL_MINUTES = 6 * 60
+
+# Most messages of cars to send in one update (each holds MAX_CARS_PER_MESSAGE)
+MAX_MESSAGES_PER_UPDATE = 4
+
+# Telegram allows about 20 messages per minute in a group
+TELEGRAM_MAX_MESSAGES_PER_MINUTE = 20
+
+# Hours when the bot stays silent, e.g. "23-6" (11pm to 6am). Empty = no quiet hours
+QUIET_HOURS = os.environ.get('QUIET_HOURS', '')
+
+# Timezone QUIET_HOURS are in - Abuja time by default, whatever the server runs on
+QUIET_HOURS_TZ = os.environ.get('QUIET_HOURS_TZ', 'Africa/Lagos')
+
+# Repeat "DATASET COMPLETE" / "NO ABUJA CARS" notices at most this often
+POOL_EMPTY_NOTICE_HOURS = 12
+
 # File to remember which cars we've already sent
 SENT_CARS_FILE = "sent_cars.json"
 
+# Folder for the historical listing archive (Parquet, partitioned by fetch date)
+ARCHIVE_DIR = os.environ.get('ARCHIVE_DIR', 'listing_archive')
+
 # ============================================
 # VERIFY ALL ENVIRONMENT VARIABLES
 # ============================================
@@ -470,12 +583,417 @@ def get_unsent_cars(all_cars: List[Dict[str, Any]], sent_cars: set) -> List[Dict
     print(f"📊 Unsent cars: {len(unsent)} out of {len(all_cars)} total")
     return unsent
 
+# ============================================
+# LISTING ARCHIVE - Keep every listing we fetch
+# ============================================
+
+# Canonical district name -> ways people write it (most specific first)
+ABUJA_DISTRICTS = {
+    'Wuse 2': ['wuse 2', 'wuse ii', 'wuse zone'],
+    'Wuse': ['wuse', 'wuse market'],
+    'Garki': ['garki', 'garki i', 'garki ii', 'garki market'],
+    'Maitama': ['maitama'],
+    'Asokoro': ['asokoro'],
+    'Central Business District': ['central business district', 'cbd', 'central area'],
+    'Jabi': ['jabi', 'jabi lake', 'jabi park'],
+    'Utako': ['utako'],
+    'Guzape': ['guzape'],
+    'Durumi': ['durumi'],
+    'Wuye': ['wuye'],
+    'Katampe': ['katampe', 'katampe extension'],
+    'Kado': ['kado', 'kado estate'],
+    'Life Camp': ['life camp', 'lifecamp'],
+    'Mabushi': ['mabushi'],
+    'Gwarinpa': ['gwarinpa', 'gwarimpa', 'gwarinpa estate'],
+    'Dawaki': ['dawaki'],
+    'Kubwa': ['kubwa'],
+    'Dutse': ['dutse'],
+    'Bwari': ['bwari'],
+    'Lugbe': ['lugbe'],
+    'Karshi': ['karshi'],
+    'Nyanya': ['nyanya'],
+    'Karu': ['karu'],
+    'Mararaba': ['mararaba'],
+    'Masaka': ['masaka'],
+    'Apo': ['apo', 'apo legislative', 'apo resettlement'],
+    'Gudu': ['gudu'],
+    'Gwagwalada': ['gwagwalada'],
+    'Zuba': ['zuba'],
+    'Dei Dei': ['dei dei', 'deidei'],
+    'Kuje': ['kuje'],
+    'Kwali': ['kwali'],
+    'Abaji': ['abaji'],
+}
+
+_DISTRICT_PATTERNS = [
+    (name, re.compile(r'\b(' + '|'.join(re.escape(alias) for alias in aliases) + r')\b'))
+    for name, aliases in ABUJA_DISTRICTS.items()
+]
+
+# Columns stored for every archived listing
+if ARCHIVE_AVAILABLE:
+    ARCHIVE_SCHEMA = pa.schema([
+        ('fetched_at', pa.timestamp('s')),
+        ('dataset_id', pa.string()),
+        ('url', pa.string()),
+        ('title', pa.string()),
+        ('price', pa.float64()),
+        ('district', pa.string()),
+        ('region', pa.string()),
+        ('is_abuja', pa.bool_()),
+        ('is_direct_seller', pa.bool_()),
+        ('is_used', pa.bool_()),
+        ('is_cheap', pa.bool_()),
+        ('is_distress', pa.bool_()),
+        ('deal_score', pa.int8()),
+    ])
+    ARCHIVE_PARTITIONING = ds.partitioning(pa.schema([('fetch_date', pa.string())]), flavor='hive')
+
+# Anything cheaper than this is a misread price, not a real one
+MIN_VALID_PRICE = 50_000
+
+# A number, then optionally a unit word: '3.2mil', '1.2 millions', '2.5mn', '850k'.
+# Only these exact words count - '4500000 make offer' or '6000000 kia' stay as is.
+# (?![\d.]) stops the number shrinking to '3' in '3.2...' when no unit follows
+_PRICE_PATTERN = re.compile(
+    r'(\d+(?:\.\d+)?)(?![\d.])\s*(?:(millions?|mil|mn|m|thousands?|k)\b)?'
+)
+
+# URLs already archived, per dataset - so each listing is stored once per dataset
+_archived_urls: Dict[str, set] = {}
+
+def parse_price(car: Dict[str, Any]) -> Optional[float]:
+    """Turn Jiji price fields ('₦ 4,500,000', '4.5M', 4500000) into Naira"""
+    price_obj = car.get('price_obj', {})
+    raw = None
+    if isinstance(price_obj, dict):
+        raw = price_obj.get('value') or price_obj.get('N')
+    if raw in (None, ''):
+        raw = car.get('price') or car.get('price_title')
+    if raw in (None, ''):
+        return None
+    if isinstance(raw, (int, float)):
+        value = float(raw)
+    else:
+        text = str(raw).lower().replace(',', '').replace('₦', '').replace('ngn', '').strip()
+        match = _PRICE_PATTERN.search(text)
+        if not match:
+            return None
+        value = float(match.group(1))
+        unit = match.group(2) or ''
+        if unit.startswith('m'):
+            value *= 1_000_000
+        elif unit in ('k', 'thousand', 'thousands'):
+            value *= 1_000
+
+    # No car sells for a few Naira - that's a price we couldn't read
+    if value < MIN_VALID_PRICE:
+        return None
+    return value
+
+def detect_district(car: Dict[str, Any]) -> Optional[str]:
+    """Find the Abuja district a listing is in - location fields first, then title/description"""
+    location_text = ' '.join(
+        str(car.get(field, '') or '') for field in
+        ('region_name', 'region', 'location', 'address', 'area', 'zone', 'district')
+    ).lower()
+    title = str(car.get('title', '')).lower()
+    description = str(car.get('short_description', '') or car.get('details', '') or '').lower()
+
+    for text in (location_text, f"{title} {description}"):
+        for name, pattern in _DISTRICT_PATTERNS:
+            if pattern.search(text):
+                return name
+    return None
+
+def resolve_district(name: str) -> str:
+    """Map a district the user typed ('gwarimpa', 'WUSE II') to its canonical name"""
+    lowered = name.strip().lower()
+    for canonical, aliases in ABUJA_DISTRICTS.items():
+        if lowered == canonical.lower() or lowered in aliases:
+            return canonical
+    return name.strip()
+
+def open_archive():
+    """Open the archive as a memory-mapped Parquet dataset (None if empty)"""
+    if not ARCHIVE_AVAILABLE or not Path(ARCHIVE_DIR).exists():
+        return None
+    dataset = ds.dataset(
+        os.path.abspath(ARCHIVE_DIR),
+        format='parquet',
+        partitioning=ARCHIVE_PARTITIONING,
+        filesystem=pafs.LocalFileSystem(use_mmap=True),
+    )
+    return dataset if dataset.files else None
+
+def load_archived_urls(dataset_id: str) -> set:
+    """Load the URLs already archived for a dataset (only reads the url column)"""
+    if dataset_id in _archived_urls:
+        return _archived_urls[dataset_id]
+
+    urls = set()
+    try:
+        archive = open_archive()
+        if archive is not None:
+            table = archive.to_table(columns=['url'], filter=ds.field('dataset_id') == dataset_id)
+            urls = set(table.column('url').to_pylist())
+    except Exception as e:
+        print(f"⚠️ Could not read archive: {e}")
+    _archived_urls[dataset_id] = urls
+    return urls
+
+def archive_listings(all_cars: List[Dict[str, Any]], abuja_cars: List[Dict[str, Any]],
+                     dataset_id: str, clock: Optional['Clock'] = None) -> int:
+    """Append new listings from this fetch to the archive, returns how many were written"""
+    if not ARCHIVE_AVAILABLE:
+        return 0
+
+    archived = load_archived_urls(dataset_id)
+    abuja_ids = {id(car) for car in abuja_cars}
+    fetched_at = (clock or CLOCK).now().replace(microsecond=0)
+    rows = []
+
+    for car in all_cars:
+        car_url = (car.get('url') or car.get('message_url') or car.get('guid') or '')
+        if not car_url or car_url in archived:
+            continue
+        analysis = car.get('analysis') or analyze_listing(car)
+        rows.append({
+            'fetched_at': fetched_at,
+            'dataset_id': dataset_id,
+            'url': car_url,
+            'title': str(car.get('title', '') or ''),
+            'price': parse_price(car),
+            'district': detect_district(car),
+            'region': str(car.get('region_name', '') or car.get('region', '') or car.get('location', '') or ''),
+            'is_abuja': id(car) in abuja_ids,
+            'is_direct_seller': analysis['is_direct_seller'],
+            'is_used': analysis['is_used'],
+            'is_cheap': analysis['is_cheap'],
+            'is_distress': analysis['is_distress'],
+            'deal_score': analysis['deal_score'],
+        })
+
+    if not rows:
+        return 0
+
+    try:
+        table = pa.Table.from_pylist(rows, schema=ARCHIVE_SCHEMA)
+        # Sorted files keep row-group min/max tight, so filters can skip whole groups
+        table = table.sort_by([('district', 'ascending'), ('price', 'ascending')])
+
+        fetch_date = fetched_at.strftime('%Y-%m-%d')
+        partition = Path(ARCHIVE_DIR) / f"fetch_date={fetch_date}"
+        partition.mkdir(parents=True, exist_ok=True)
+        file_name = f"part-{fetched_at.strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8]}.parquet"
+        # Write under a dot-name first so readers never see a half-written file
+        tmp_path = partition / f".{file_name}.tmp"
+        pq.write_table(table, tmp_path, compression='zstd')
+        os.replace(tmp_path, partition / file_name)
+
+        archived.update(row['url'] for row in rows)
+        print(f"🗄️ Archived {len(rows)} new listings")
+        compact_archive(keep_date=fetch_date)
+        return len(rows)
+    except Exception as e:
+        print(f"⚠️ Could not archive listings: {e}")
+        return 0
+
+def compact_archive(keep_date: str):
+    """Merge the small per-fetch files of finished days into one file per day"""
+    for partition in sorted(Path(ARCHIVE_DIR).glob('fetch_date=*')):
+        if partition.name == f"fetch_date={keep_date}":
+            continue
+        parts = sorted(partition.glob('part-*.parquet'))
+        if len(parts) < 2:
+            continue
+        try:
+            table = pa.concat_tables(pq.read_table(part, schema=ARCHIVE_SCHEMA) for part in parts)
+            # Keep the first copy of each listing, so rows left behind by an
+            # interrupted compaction never pile up
+            table = table.sort_by([('fetched_at', 'ascending')])
+            table = table.append_column('_row', pa.array(range(table.num_rows), type=pa.int64()))
+            first_rows = table.group_by(['dataset_id', 'url']).aggregate([('_row', 'min')])
+            table = table.take(first_rows.column('_row_min'))
+            table = table.select([field.name for field in ARCHIVE_SCHEMA])
+            table = table.sort_by([('district', 'ascending'), ('price', 'ascending')])
+
+            # New file gets its own name; old parts go only after it's in place,
+            # so a reader always sees every row at least once
+            file_name = f"part-compacted-{uuid.uuid4().hex[:8]}.parquet"
+            tmp_path = partition / f".{file_name}.tmp"
+            pq.write_table(table, tmp_path, compression='zstd', row_group_size=128 * 1024)
+            os.replace(tmp_path, partition / file_name)
+            for part in parts:
+                part.unlink(missing_ok=True)
+            print(f"🗜️ Compacted {len(parts)} files in {partition.name}")
+        except Exception as e:
+            print(f"⚠️ Could not compact {partition.name}: {e}")
+
+def query_archive(district: Optional[str] = None, min_price: Optional[float] = None,
+                  max_price: Optional[float] = None, days: Optional[int] = None,
+                  dataset_id: Optional[str] = None, is_direct_seller: Optional[bool] = None,
+                  is_used: Optional[bool] = None, is_cheap: Optional[bool] = None,
+                  is_distress: Optional[bool] = None, min_score: Optional[int] = None,
+                  columns: Optional[List[str]] = None, limit: Optional[int] = 100,
+                  clock: Optional['Clock'] = None) -> List[Dict[str, Any]]:
+    """
+    Query archived listings, newest first.
+    e.g. query_archive(district='Gwarinpa', is_distress=True, max_price=5_000_000, days=30)
+    Only the requested columns are read, and old days are skipped without opening their files.
+    Raises ValueError for unknown columns or a negative limit.
+    """
+    if not ARCHIVE_AVAILABLE:
+        return []
+
+    all_columns = [field.name for field in ARCHIVE_SCHEMA]
+    unknown = [name for name in (columns or []) if name not in all_columns]
+    if unknown:
+        raise ValueError(f"Unknown columns: {', '.join(unknown)} (choose from {', '.join(all_columns)})")
+    if limit is not None and limit < 0:
+        raise ValueError("limit can't be negative")
+
+    conditions = []
+    if district:
+        conditions.append(ds.field('district') == resolve_district(district))
+    if min_price is not None:
+        conditions.append(ds.field('price') >= min_price)
+    if max_price is not None:
+        conditions.append(ds.field('price') <= max_price)
+    if days is not None:
+        cutoff = (clock or CLOCK).now().replace(microsecond=0) - timedelta(days=days)
+        # Partition filter lets the scan skip whole days
+        conditions.append(ds.field('fetch_date') >= cutoff.strftime('%Y-%m-%d'))
+        conditions.append(ds.field('fetched_at') >= pa.scalar(cutoff, type=pa.timestamp('s')))
+    if dataset_id:
+        conditions.append(ds.field('dataset_id') == dataset_id)
+    for name, wanted in (('is_direct_seller', is_direct_seller), ('is_used', is_used),
+                         ('is_cheap', is_cheap), ('is_distress', is_distress)):
+        if wanted is not None:
+            conditions.append(ds.field(name) == wanted)
+    if min_score is not None:
+        conditions.append(ds.field('deal_score') >= min_score)
+
+    row_filter = None
+    for condition in conditions:
+        row_filter = condition if row_filter is None else row_filter & condition
+
+    columns = columns or all_columns
+    # Compaction may delete a file mid-scan - reopen and try once more
+    for attempt in range(2):
+        archive = open_archive()
+        if archive is None:
+            return []
+        try:
+            table = archive.to_table(columns=columns, filter=row_filter)
+            break
+        except (FileNotFoundError, OSError):
+            if attempt:
+                raise
+    if 'fetched_at' in columns and table.num_rows:
+        table = table.take(pc.sort_indices(table, sort_keys=[('fetched_at', 'descending')]))
+    if limit is not None:
+        table = table.slice(0, limit)
+
+    rows = table.to_pylist()
+    for row in rows:
+        if isinstance(row.get('fetched_at'), datetime):
+            row['fetched_at'] = row['fetched_at'].isoformat()
+    return rows
+
+def archive_stats() -> Dict[str, Any]:
+    """Summarise the archive - row count from Parquet metadata, no data scan"""
+    for attempt in range(2):
+        archive = open_archive()
+        if archive is None:
+            return {'enabled': ARCHIVE_AVAILABLE, 'rows': 0, 'files': 0, 'days': []}
+        try:
+            rows = sum(fragment.metadata.num_rows for fragment in archive.get_fragments())
+            break
+        except (FileNotFoundError, OSError):
+            if attempt:
+                raise
+    days = sorted({Path(path).parent.name.split('=', 1)[1] for path in archive.files})
+    return {'enabled': True, 'rows': rows, 'files': len(archive.files), 'days': days}
+
+# ============================================
+# CLOCK & RATE LIMITS - Time source for scheduling
+# ============================================
+
+class Clock:
+    """Real wall-clock time. Swap in SimulatedClock to test scheduling without waiting"""
+
+    def now(self) -> datetime:
+        return datetime.now()
+
+    def sleep(self, seconds: float):
+        time.sleep(seconds)
+
+class SimulatedClock(Clock):
+    """Fake time that jumps forward on sleep() - days of scheduling run instantly"""
+
+    def __init__(self, start: Optional[datetime] = None):
+        self.current = start or datetime(2024, 1, 1, 12, 0)
+
+    def now(self) -> datetime:
+        return self.current
+
+    def sleep(self, seconds: float):
+        self.current += timedelta(seconds=seconds)
+
+class TelegramRateLimiter:
+    """Track recent sends so we never go over Telegram's per-minute limit"""
+
+    def __init__(self, clock: Clock, max_per_minute: int = TELEGRAM_MAX_MESSAGES_PER_MINUTE):
+        self.clock = clock
+        self.max_per_minute = max_per_minute
+        self.recent_sends = deque()
+        self.blocked_until: Optional[datetime] = None
+
+    def _forget_old_sends(self):
+        cutoff = self.clock.now() - timedelta(minutes=1)
+        while self.recent_sends and self.recent_sends[0] <= cutoff:
+            self.recent_sends.popleft()
+
+    def record_send(self):
+        self.recent_sends.append(self.clock.now())
+
+    def record_retry_after(self, seconds: float):
+        """Telegram said 429 - stop sending until retry_after has passed"""
+        self.blocked_until = self.clock.now() + timedelta(seconds=seconds)
+
+    def headroom(self) -> int:
+        """How many more messages we can send right now"""
+        if self.blocked_until and self.clock.now() < self.blocked_until:
+            return 0
+        self._forget_old_sends()
+        return max(0, self.max_per_minute - len(self.recent_sends))
+
+    def wait_seconds(self) -> float:
+        """How long until at least one message can be sent again"""
+        now = self.clock.now()
+        if self.blocked_until and now < self.blocked_until:
+            return (self.blocked_until - now).total_seconds()
+        self._forget_old_sends()
+        if len(self.recent_sends) < self.max_per_minute:
+            return 0
+        return (self.recent_sends[0] + timedelta(minutes=1) - now).total_seconds()
+
+CLOCK = Clock()
+telegram_limiter = TelegramRateLimiter(CLOCK)
+
 # ============================================
 # TELEGRAM FUNCTIONS
 # ============================================
 
-def send_telegram_message(text: str, parse_mode: str = "Markdown") -> bool:
-    """Send message to Telegram"""
+def deliver_telegram_message(text: str, parse_mode: str = "Markdown",
+                             limiter: Optional[TelegramRateLimiter] = None) -> str:
+    """
+    Send message to Telegram and say how it went (sends and 429s are recorded on `limiter`):
+    'sent', 'rate_limited' (429), 'rejected' (Telegram refused this message, e.g. bad
+    Markdown - sending it again won't help) or 'failed' (network/server trouble)
+    """
+    limiter = limiter or telegram_limiter
     url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
     
     payload = {
@@ -487,12 +1005,30 @@ def send_telegram_message(text: str, parse_mode: str = "Markdown") -> bool:
     
     try:
         response = requests.post(url, json=payload)
+        if response.status_code == 429:
+            retry_after = response.json().get('parameters', {}).get('retry_after', 60)
+            limiter.record_retry_after(retry_after)
+            print(f"⏳ Telegram rate limit hit, retry after {retry_after}s")
+            return 'rate_limited'
+        if 400 <= response.status_code < 500:
+            print(f"❌ Telegram rejected the message ({response.status_code}): {response.text[:200]}")
+            return 'rejected'
         response.raise_for_status()
+        limiter.record_send()
         print("✅ Message sent to Telegram")
-        return True
+        return 'sent'
     except Exception as e:
         print(f"❌ Failed to send: {e}")
-        return False
+        return 'failed'
+
+def send_telegram_message(text: str, parse_mode: str = "Markdown",
+                          limiter: Optional[TelegramRateLimiter] = None) -> bool:
+    """Send message to Telegram, True if it went out"""
+    return deliver_telegram_message(text, parse_mode, limiter) == 'sent'
+
+def escape_markdown(text: Any) -> str:
+    """Escape Telegram Markdown characters in listing text (a '_' in a title breaks the whole message)"""
+    return re.sub(r'([_*`\[])', r'\\\1', str(text))
 
 def format_car_message(cars: List[Dict[str, Any]], title: str = "Abuja Cars Update", 
                        cars_left: int = 0, total_cars: int = 0) -> str:
@@ -502,7 +1038,7 @@ def format_car_message(cars: List[Dict[str, Any]], title: str = "Abuja Cars Upda
     
     for i, car in enumerate(cars, 1):
         # Get basic info
-        car_title = car.get('title', 'Unknown Car')
+        car_title = escape_markdown(car.get('title', 'Unknown Car'))
         
         # Price handling
         price_obj = car.get('price_obj', {})
@@ -510,10 +1046,11 @@ def format_car_message(cars: List[Dict[str, Any]], title: str = "Abuja Cars Upda
             price = price_obj.get('N', '') or price_obj.get('value', '') or 'Price N/A'
         else:
             price = car.get('price_title', 'Price N/A')
+        price = escape_markdown(price)
         
         # Location
-        location = (car.get('region_name', '') or car.get('region', '') or 
-                   car.get('location', '') or 'Abuja')
+        location = escape_markdown(car.get('region_name', '') or car.get('region', '') or 
+                                   car.get('location', '') or 'Abuja')
         
         # 🔗 URL FIX - Add Jiji domain if needed
         url_path = (car.get('url') or car.get('message_url') or car.get('guid') or '')
@@ -561,10 +1098,18 @@ def format_car_message(cars: List[Dict[str, Any]], title: str = "Abuja Cars Upda
 # MAIN BOT LOGIC
 # ============================================
 
-def send_car_update():
-    """Main function: Send 8 new Abuja cars from your dataset"""
+def send_car_update(pick_batch_size: Optional[Callable[[int], int]] = None,
+                    clock: Optional[Clock] = None,
+                    limiter: Optional[TelegramRateLimiter] = None) -> Dict[str, Any]:
+    """
+    Main function: Send the next new Abuja cars from your dataset.
+    pick_batch_size gets the number of unsent cars and returns how many to send now
+    (default: one message of MAX_CARS_PER_MESSAGE). Returns what happened so the
+    scheduler can decide when to check again.
+    """
+    clock = clock or CLOCK
     print(f"\n{'='*50}")
-    print(f"🔍 Checking at {datetime.now()}")
+    print(f"🔍 Checking at {clock.now()}")
     print(f"{'='*50}")
     
     # Load sent cars
@@ -575,62 +1120,96 @@ def send_car_update():
     all_cars = fetch_all_cars_from_dataset()
     
     if not all_cars:
-        send_telegram_message("❌ Could not fetch cars from Apify. Check token or dataset ID.")
-        return
+        return {'status': 'fetch_failed', 'sent': 0, 'skipped': 0, 'unsent': 0, 'remaining': 0,
+                'total': 0, 'abuja': 0}
     
     # Filter for Abuja only
     abuja_cars = filter_abuja_only(all_cars)
     
+    # Keep a copy of every listing before the dataset gets replaced
+    archive_listings(all_cars, abuja_cars, APIFY_DATASET_ID, clock=clock)
+    
     # Get unsent Abuja cars
     unsent_cars = get_unsent_cars(abuja_cars, sent_cars)
     
+    result = {'status': 'sent', 'sent': 0, 'skipped': 0, 'unsent': len(unsent_cars),
+              'remaining': len(unsent_cars), 'total': len(all_cars), 'abuja': len(abuja_cars)}
+    
     # Check if any unsent cars left
     if not unsent_cars:
-        if len(abuja_cars) == 0:
-            message = (
-                "⚠️ *NO ABUJA CARS FOUND* ⚠️\n\n"
-                f"✅ Dataset has {len(all_cars)} cars total\n"
-                "❌ But none for Abuja/FCT\n\n"
-                "🔄 *Next step:*\n"
-                "1. Run Jiji scraper again\n"
-                "2. Target Abuja specifically"
-            )
-        else:
-            message = (
-                "⚠️ *DATASET COMPLETE* ⚠️\n\n"
-                f"✅ All {len(abuja_cars)} Abuja cars have been sent!\n"
-                f"📊 Total in dataset: {len(all_cars)} cars\n\n"
-                "🔄 *Next step:*\n"
-                "1. Go to Apify Console\n"
-                "2. Run the Jiji scraper again\n"
-                "3. Update DATASET_ID in Render\n\n"
-                "Bot will pause until new dataset is added."
-            )
-        send_telegram_message(message)
+        result['status'] = 'no_abuja' if len(abuja_cars) == 0 else 'complete'
         print("🏁 All Abuja cars sent! Waiting for new dataset...")
-        return
+        return result
     
-    # Take next 8 cars
-    next_items = unsent_cars[:MAX_CARS_PER_MESSAGE]
+    # Take the next batch
+    batch_size = pick_batch_size(len(unsent_cars)) if pick_batch_size else MAX_CARS_PER_MESSAGE
+    next_items = unsent_cars[:batch_size]
     
-    # Mark as sent
-    for item in next_items:
-        item_url = (item.get('url') or item.get('message_url') or item.get('guid') or '')
-        if item_url:
-            sent_cars.add(item_url)
+    # Send in messages of MAX_CARS_PER_MESSAGE - only mark cars sent once Telegram accepts them
+    sent_count = 0
+    skipped_count = 0
+    for start in range(0, len(next_items), MAX_CARS_PER_MESSAGE):
+        chunk = next_items[start:start + MAX_CARS_PER_MESSAGE]
+        items_remaining = len(unsent_cars) - sent_count - skipped_count - len(chunk)
+        
+        if start > 0:
+            # Telegram wants about a second between messages to the same chat
+            clock.sleep(1)
+        
+        title = f"Next {len(chunk)} Abuja Cars ({items_remaining} Abuja remaining)"
+        message = format_car_message(chunk, title, items_remaining, len(abuja_cars))
+        outcome = deliver_telegram_message(message, limiter=limiter)
+        if outcome in ('rate_limited', 'failed'):
+            # Worth trying again later - leave these cars unsent
+            break
+        
+        # Sent, or refused for good - either way don't let this chunk block the queue
+        for item in chunk:
+            item_url = (item.get('url') or item.get('message_url') or item.get('guid') or '')
+            if item_url:
+                sent_cars.add(item_url)
+        if outcome == 'sent':
+            sent_count += len(chunk)
+        else:
+            skipped_count += len(chunk)
+            print(f"⏭️ Skipping {len(chunk)} cars Telegram won't accept")
     
     # Save sent cars
-    save_sent_cars(sent_cars)
+    if sent_count or skipped_count:
+        save_sent_cars(sent_cars)
     
-    # Calculate remaining
-    items_remaining = len(unsent_cars) - len(next_items)
-    
-    # Format and send message
-    title = f"Next {len(next_items)} Abuja Cars ({items_remaining} Abuja remaining)"
-    message = format_car_message(next_items, title, items_remaining, len(abuja_cars))
-    send_telegram_message(message)
-    
-    print(f"✅ Sent {len(next_items)} Abuja cars. {items_remaining} Abuja cars left")
+    result['sent'] = sent_count
+    result['skipped'] = skipped_count
+    result['remaining'] = len(unsent_cars) - sent_count - skipped_count
+    print(f"✅ Sent {sent_count} Abuja cars. {result['remaining']} Abuja cars left")
+    return result
+
+def send_pool_empty_notice(result: Dict[str, Any],
+                           limiter: Optional[TelegramRateLimiter] = None) -> bool:
+    """Tell the chat there's nothing left to send (or nothing could be fetched). Returns True if it went out"""
+    if result['status'] == 'fetch_failed':
+        message = "❌ Could not fetch cars from Apify. Check token or dataset ID."
+    elif result['status'] == 'no_abuja':
+        message = (
+            "⚠️ *NO ABUJA CARS FOUND* ⚠️\n\n"
+            f"✅ Dataset has {result['total']} cars total\n"
+            "❌ But none for Abuja/FCT\n\n"
+            "🔄 *Next step:*\n"
+            "1. Run Jiji scraper again\n"
+            "2. Target Abuja specifically"
+        )
+    else:
+        message = (
+            "⚠️ *DATASET COMPLETE* ⚠️\n\n"
+            f"✅ All {result['abuja']} Abuja cars have been sent!\n"
+            f"📊 Total in dataset: {result['total']} cars\n\n"
+            "🔄 *Next step:*\n"
+            "1. Go to Apify Console\n"
+            "2. Run the Jiji scraper again\n"
+            "3. Update DATASET_ID in Render\n\n"
+            "Bot will check less often until new cars are added."
+        )
+    return send_telegram_message(message, limiter=limiter)
 
 def send_startup_message():
     """Send message when bot starts"""
@@ -638,6 +1217,7 @@ def send_startup_message():
     sent_count = len(sent_cars)
     
     now = datetime.now().strftime("%Y-%m-%d %H:%M")
+    quiet = f"\n🌙 Quiet hours: {QUIET_HOURS} ({QUIET_HOURS_TZ})" if parse_quiet_hours(QUIET_HOURS) else ""
     
     message = (
         "🤖 *Abuja Car Bot Restarted*\n\n"
@@ -645,18 +1225,215 @@ def send_startup_message():
         f"📡 Dataset: `{APIFY_DATASET_ID[:8]}...`\n"
         f"📍 *Filter:* Abuja/FCT only 🇳🇬\n"
         f"📊 Progress: {sent_count} Abuja cars sent so far\n"
-        "⏰ Sending 8 Abuja cars every 30 minutes\n\n"
+        f"⏰ Adaptive: every {MIN_INTERVAL_MINUTES} min to {MAX_INTERVAL_MINUTES // 60} hours, "
+        f"up to {MAX_CARS_PER_MESSAGE * MAX_MESSAGES_PER_UPDATE} cars per update{quiet}\n\n"
         "_Updates starting soon..._"
     )
     send_telegram_message(message)
 
+# ============================================
+# ADAPTIVE SCHEDULER - Decide when to check and how much to send
+# ============================================
+
+def parse_quiet_hours(value: str) -> Optional[Tuple[int, int]]:
+    """Parse "23-6" into (23, 6). Returns None if empty or invalid"""
+    match = re.fullmatch(r'\s*(\d{1,2})\s*-\s*(\d{1,2})\s*', value or '')
+    if not match:
+        if value:
+            print(f"⚠️ Ignoring invalid QUIET_HOURS '{value}' (use e.g. 23-6)")
+        return None
+    start, end = int(match.group(1)), int(match.group(2))
+    if start == end or start > 23 or end > 23:
+        return None
+    return start, end
+
+def get_quiet_hours_tz(name: str) -> tzinfo:
+    """Look up the QUIET_HOURS_TZ zone, falling back to WAT (UTC+1, no daylight saving)"""
+    if ZoneInfo is not None:
+        try:
+            return ZoneInfo(name)
+        except Exception as e:
+            print(f"⚠️ Unknown QUIET_HOURS_TZ '{name}' ({e}), using UTC+1")
+    return timezone(timedelta(hours=1), 'WAT')
+
+class AdaptiveScheduler:
+    """
+    Runs send_car_update on a changing cadence:
+    - big unsent pool or lots of new arrivals -> check more often and send more messages
+    - nothing changes -> double the wait each time, up to MAX_INTERVAL_MINUTES
+    - never over Telegram's rate limit, never during quiet hours
+    - "DATASET COMPLETE"-style notices only when the situation changes, or every
+      POOL_EMPTY_NOTICE_HOURS while it stays the same
+    """
+
+    def __init__(self, update: Callable[..., Dict[str, Any]] = send_car_update,
+                 notify: Callable[..., bool] = send_pool_empty_notice,
+                 clock: Optional[Clock] = None, limiter: Optional[TelegramRateLimiter] = None,
+                 quiet_hours: Optional[Tuple[int, int]] = None,
+                 quiet_hours_tz: Optional[tzinfo] = None):
+        """
+        update(pick_batch_size, clock=, limiter=) and notify(result, limiter=) get this
+        scheduler's clock and limiter, so one SimulatedClock drives everything.
+        quiet_hours_tz: zone the quiet hours are in (None = compare clock time as-is)
+        """
+        self.update = update
+        self.notify = notify
+        self.clock = clock or CLOCK
+        if limiter is None:
+            limiter = telegram_limiter if self.clock is CLOCK else TelegramRateLimiter(self.clock)
+        self.limiter = limiter
+        self.quiet_hours = quiet_hours
+        self.quiet_hours_tz = quiet_hours_tz
+        
+        self.next_run = self.clock.now()
+        self.interval = timedelta(minutes=BASE_INTERVAL_MINUTES)
+        self.last_result: Optional[Dict[str, Any]] = None
+        self.last_run: Optional[datetime] = None
+        self.last_good_result: Optional[Dict[str, Any]] = None
+        self.last_good_run: Optional[datetime] = None
+        # New unsent cars per hour, smoothed over recent checks
+        self.arrival_rate = 0.0
+        self.last_notice: Optional[Tuple[Tuple, datetime]] = None
+
+    # ---------- quiet hours ----------
+
+    def _local(self, when: datetime) -> datetime:
+        """`when` in the quiet-hours timezone (naive clock times are server-local)"""
+        return when.astimezone(self.quiet_hours_tz) if self.quiet_hours_tz else when
+
+    def in_quiet_hours(self, when: datetime) -> bool:
+        if not self.quiet_hours:
+            return False
+        start, end = self.quiet_hours
+        hour = self._local(when).hour
+        if start < end:
+            return start <= hour < end
+        return hour >= start or hour < end
+
+    def quiet_hours_end(self, when: datetime) -> datetime:
+        """First moment after `when` that is outside quiet hours"""
+        local = self._local(when)
+        end = local.replace(hour=self.quiet_hours[1], minute=0, second=0, microsecond=0)
+        if end <= local:
+            end += timedelta(days=1)
+        # Step forward by the same amount, keeping `when`'s own timezone style
+        return when + (end - local)
+
+    # ---------- batch size & interval ----------
+
+    def pick_batch_size(self, unsent: int) -> int:
+        """How many cars to send now - enough messages to work through the pool, within Telegram headroom"""
+        messages_needed = math.ceil(unsent / MAX_CARS_PER_MESSAGE)
+        # Keep one message spare for notices, unless that's all we have
+        headroom = self.limiter.headroom()
+        if headroom > 1:
+            headroom -= 1
+        messages = min(messages_needed, MAX_MESSAGES_PER_UPDATE, headroom)
+        return messages * MAX_CARS_PER_MESSAGE
+
+    def _track_arrivals(self, result: Dict[str, Any], now: datetime) -> int:
+        """Count cars that showed up since the last good fetch and update the arrival rate"""
+        # A failed fetch says nothing about the pool - compare good fetches only
+        if result['status'] == 'fetch_failed' or self.last_good_result is None:
+            return 0
+        arrivals = max(0, result['unsent'] - self.last_good_result['remaining'])
+        hours = max((now - self.last_good_run).total_seconds() / 3600, 1 / 60)
+        self.arrival_rate = 0.5 * self.arrival_rate + 0.5 * (arrivals / hours)
+        return arrivals
+
+    def _something_changed(self, result: Dict[str, Any], arrivals: int) -> bool:
+        if result['sent'] or result['skipped'] or arrivals:
+            return True
+        last = self.last_result
+        return last is None or last['status'] != result['status'] or last['total'] != result['total']
+
+    def choose_interval(self, result: Dict[str, Any], changed: bool) -> timedelta:
+        base = timedelta(minutes=BASE_INTERVAL_MINUTES)
+        shortest = timedelta(minutes=MIN_INTERVAL_MINUTES)
+        longest = timedelta(minutes=MAX_INTERVAL_MINUTES)
+        
+        if not changed:
+            # Same as last time - double the wait
+            return min(longest, max(base, self.interval * 2))
+        
+        # Expected pool at the next base-interval check
+        pool = result['remaining'] + self.arrival_rate * BASE_INTERVAL_MINUTES / 60
+        per_update = MAX_CARS_PER_MESSAGE * MAX_MESSAGES_PER_UPDATE
+        if pool <= per_update:
+            return base
+        # Bigger backlog -> shorter wait, so it drains in hours instead of days
+        return max(shortest, base * (per_update / pool))
+
+    # ---------- main loop ----------
+
+    def _maybe_notify(self, result: Dict[str, Any], now: datetime):
+        """Send the pool-empty notice once per situation, repeating only every POOL_EMPTY_NOTICE_HOURS"""
+        key = (result['status'], result['total'], result['abuja'])
+        if self.last_notice:
+            last_key, last_time = self.last_notice
+            if last_key == key and now - last_time < timedelta(hours=POOL_EMPTY_NOTICE_HOURS):
+                print("🔕 Same situation as last notice - not repeating it")
+                return
+        # Only remember notices that reached the chat - a failed one is retried next tick
+        if self.notify(result, limiter=self.limiter):
+            self.last_notice = (key, now)
+
+    def tick(self) -> Optional[Dict[str, Any]]:
+        """Run one check now (unless in quiet hours) and work out the next run time"""
+        now = self.clock.now()
+        if self.in_quiet_hours(now):
+            self.next_run = self.quiet_hours_end(now)
+            print(f"🌙 Quiet hours - next check at {self.next_run}")
+            return None
+        
+        result = self.update(self.pick_batch_size, clock=self.clock, limiter=self.limiter)
+        now = self.clock.now()
+        arrivals = self._track_arrivals(result, now)
+        changed = self._something_changed(result, arrivals)
+        
+        if result['status'] == 'sent':
+            self.last_notice = None
+        else:
+            self._maybe_notify(result, now)
+        
+        if result['status'] == 'sent' and not result['sent'] and self.limiter.wait_seconds() > 0:
+            # Rate limited (429 or our own per-minute cap) - retry as soon as headroom frees up
+            self.interval = timedelta(seconds=max(self.limiter.wait_seconds(), 60))
+        else:
+            self.interval = self.choose_interval(result, changed)
+        next_run = now + self.interval
+
+        # Out of Telegram headroom with cars waiting - don't come back before it frees up
+        wait = self.limiter.wait_seconds()
+        if result['remaining'] and wait:
+            next_run = max(next_run, now + timedelta(seconds=wait))
+        if self.in_quiet_hours(next_run):
+            next_run = self.quiet_hours_end(next_run)
+        
+        self.next_run = next_run
+        self.last_result = result
+        self.last_run = now
+        if result['status'] != 'fetch_failed':
+            self.last_good_result = result
+            self.last_good_run = now
+        print(f"⏰ Next check at {next_run.strftime('%Y-%m-%d %H:%M')} "
+              f"(pool {result['remaining']}, ~{self.arrival_rate:.1f} new/hour)")
+        return result
+
+    def run_forever(self):
+        while True:
+            if self.clock.now() >= self.next_run:
+                self.tick()
+            wait = (self.next_run - self.clock.now()).total_seconds()
+            self.clock.sleep(min(max(wait, 1), 60))
+
 def run_continuous():
     """Run continuously - NO PROMPTS, AUTO-START"""
     print("""
     ╔════════════════════════════════╗
     ║    ABUJA CAR BOT - FINAL VERSION ║
     ║    AUTO-START - NO PROMPTS     ║
-    ║    Sending 8 Abuja cars every 30 min║
+    ║    Adaptive schedule - Abuja cars║
     ╚════════════════════════════════╝
     """)
     print(f"📡 Dataset ID: {APIFY_DATASET_ID}")
@@ -666,18 +1443,14 @@ def run_continuous():
     except Exception as e:
         print(f"⚠️ Could not send startup message: {e}")
     
-    # Run immediately
-    send_car_update()
-    
-    # Schedule regular checks
-    schedule.every(30).minutes.do(send_car_update)
+    # First check runs immediately, then the scheduler picks the pace
+    scheduler = AdaptiveScheduler(quiet_hours=parse_quiet_hours(QUIET_HOURS),
+                                  quiet_hours_tz=get_quiet_hours_tz(QUIET_HOURS_TZ))
     
     # Keep running forever
     print("📡 Bot is running. Press Ctrl+C to stop.")
     try:
-        while True:
-            schedule.run_pending()
-            time.sleep(60)
+        scheduler.run_forever()
     except KeyboardInterrupt:
         print("\n👋 Bot stopped by user")
         try:
@@ -0,0 +1,11 @@
+import os
+import sys
+
+# simple_bot checks these at import time and exits if they're missing
+os.environ.setdefault('APIFY_TOKEN', 'test-token')
+os.environ.setdefault('TELEGRAM_BOT_TOKEN', 'test-bot-token')
+os.environ.setdefault('TELEGRAM_CHAT_ID', 'test-chat')
+os.environ.setdefault('DATASET_ID', 'test-dataset-id')
+os.environ.setdefault('PORT', '0')
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
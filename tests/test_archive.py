@@ -0,0 +1,200 @@
+import shutil
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+import simple_bot as bot
+
+pytestmark = pytest.mark.skipif(not bot.ARCHIVE_AVAILABLE, reason="pyarrow not installed")
+
+
+@pytest.fixture
+def archive_dir(tmp_path, monkeypatch):
+    path = tmp_path / 'listing_archive'
+    monkeypatch.setattr(bot, 'ARCHIVE_DIR', str(path))
+    monkeypatch.setattr(bot, '_archived_urls', {})
+    return path
+
+
+@pytest.fixture
+def clock():
+    return bot.SimulatedClock(datetime(2026, 9, 1, 10, 0))
+
+
+def car(url, title='Toyota Camry', region='Abuja', price='₦ 4,500,000', **extra):
+    return dict(url=url, title=title, region_name=region, price=price, **extra)
+
+
+@pytest.mark.parametrize('price, expected', [
+    ('₦ 4,500,000', 4_500_000),
+    ('4.5M', 4_500_000),
+    ('3.2mil', 3_200_000),
+    ('1.2 millions', 1_200_000),
+    ('2.5mn', 2_500_000),
+    ('850k', 850_000),
+    ('850 thousand', 850_000),
+    ('₦ 4,500,000 Make Offer', 4_500_000),
+    ('4500000 mint condition', 4_500_000),
+    ('₦ 6,000,000 kia', 6_000_000),
+    (4500000, 4_500_000),
+    ('₦ 3', None),
+    (12, None),
+    ('Contact for price', None),
+    ('', None),
+])
+def test_parse_price(price, expected):
+    assert bot.parse_price({'price': price}) == expected
+
+
+def test_parse_price_prefers_price_obj():
+    assert bot.parse_price({'price_obj': {'value': 7_000_000}, 'price': '1m'}) == 7_000_000
+
+
+def test_detect_district():
+    assert bot.detect_district({'region_name': 'Abuja, Wuse II'}) == 'Wuse 2'
+    assert bot.detect_district({'title': 'Clean Camry in Gwarimpa estate'}) == 'Gwarinpa'
+    # Location fields win over the title
+    assert bot.detect_district({'region_name': 'Kubwa', 'title': 'Moving from Garki'}) == 'Kubwa'
+    # Whole words only - 'apollo' is not Apo
+    assert bot.detect_district({'title': 'Apollo tyres, Lagos'}) is None
+
+
+def test_resolve_district():
+    assert bot.resolve_district('gwarimpa') == 'Gwarinpa'
+    assert bot.resolve_district(' WUSE II ') == 'Wuse 2'
+    assert bot.resolve_district('Somewhere') == 'Somewhere'
+
+
+def test_archive_listings_stores_each_listing_once_per_dataset(archive_dir, clock):
+    cars = [car('/a'), car('/b')]
+
+    assert bot.archive_listings(cars, cars[:1], 'ds1', clock=clock) == 2
+    assert bot.archive_listings(cars + [car('/c')], [], 'ds1', clock=clock) == 1
+    # A new dataset keeps its own copy
+    assert bot.archive_listings(cars, [], 'ds2', clock=clock) == 2
+
+    # Already-archived URLs are read back from disk after a restart
+    bot._archived_urls.clear()
+    assert bot.archive_listings(cars, [], 'ds1', clock=clock) == 0
+
+    rows = bot.query_archive(dataset_id='ds1', limit=None, clock=clock)
+    assert sorted(row['url'] for row in rows) == ['/a', '/b', '/c']
+    first = next(row for row in rows if row['url'] == '/a')
+    assert first['is_abuja'] is True
+    assert first['price'] == 4_500_000
+    assert first['fetched_at'] == '2026-09-01T10:00:00'
+
+
+def test_compact_archive_merges_finished_days_and_drops_duplicates(archive_dir, clock):
+    bot.archive_listings([car('/a'), car('/b')], [], 'ds1', clock=clock)
+    clock.sleep(3600)
+    bot.archive_listings([car('/c')], [], 'ds1', clock=clock)
+
+    # Leftover from a compaction that died before removing the old parts
+    day = archive_dir / 'fetch_date=2026-09-01'
+    first_part = sorted(day.glob('part-*.parquet'))[0]
+    shutil.copy(first_part, day / 'part-compacted-deadbeef.parquet')
+
+    clock.sleep(24 * 3600)
+    bot.archive_listings([car('/d')], [], 'ds1', clock=clock)
+
+    files = list(day.glob('*.parquet'))
+    assert len(files) == 1 and files[0].name.startswith('part-compacted-')
+    assert not list(day.glob('.*'))
+    rows = bot.query_archive(limit=None, clock=clock)
+    assert sorted(row['url'] for row in rows) == ['/a', '/b', '/c', '/d']
+
+
+def test_query_archive_filters(archive_dir, clock):
+    bot.archive_listings([
+        car('/cheap-distress', title='Urgent sale Corolla', region='Gwarinpa', price='3.2mil'),
+        car('/dear-distress', title='Urgent sale Lexus', region='Gwarinpa', price='12m'),
+        car('/other-district', title='Urgent sale Camry', region='Kubwa', price='3m'),
+        car('/not-distress', title='Honda Accord', region='Gwarinpa', price='2.5mn'),
+    ], [], 'ds1', clock=clock)
+
+    rows = bot.query_archive(district='gwarimpa', is_distress=True, max_price=5_000_000,
+                             days=30, clock=clock)
+    assert [row['url'] for row in rows] == ['/cheap-distress']
+
+    rows = bot.query_archive(min_price=3_000_000, columns=['url', 'price'], limit=None, clock=clock)
+    assert all(set(row) == {'url', 'price'} for row in rows)
+    assert sorted(row['url'] for row in rows) == ['/cheap-distress', '/dear-distress', '/other-district']
+
+    assert len(bot.query_archive(limit=2, clock=clock)) == 2
+    with pytest.raises(ValueError):
+        bot.query_archive(columns=['nope'])
+    with pytest.raises(ValueError):
+        bot.query_archive(limit=-1)
+
+
+def test_query_archive_days_cutoff_newest_first(archive_dir, clock):
+    bot.archive_listings([car('/old')], [], 'ds1', clock=clock)
+    clock.sleep(40 * 24 * 3600)
+    bot.archive_listings([car('/new')], [], 'ds1', clock=clock)
+
+    assert [row['url'] for row in bot.query_archive(days=30, clock=clock)] == ['/new']
+    assert [row['url'] for row in bot.query_archive(clock=clock)] == ['/new', '/old']
+
+
+def test_query_archive_without_pyarrow(monkeypatch):
+    monkeypatch.setattr(bot, 'ARCHIVE_AVAILABLE', False)
+    assert bot.query_archive() == []
+    assert bot.query_archive(district='Gwarinpa', max_price=5_000_000) == []
+
+
+def test_archive_stats(archive_dir, clock):
+    assert bot.archive_stats() == {'enabled': True, 'rows': 0, 'files': 0, 'days': []}
+
+    bot.archive_listings([car('/a'), car('/b')], [], 'ds1', clock=clock)
+    clock.sleep(24 * 3600)
+    bot.archive_listings([car('/c')], [], 'ds1', clock=clock)
+
+    assert bot.archive_stats() == {'enabled': True, 'rows': 3, 'files': 2,
+                                   'days': ['2026-09-01', '2026-09-02']}
+
+
+@pytest.fixture
+def client():
+    if not hasattr(bot, 'web_app'):
+        pytest.skip("flask not installed")
+    return bot.web_app.test_client()
+
+
+def test_archive_query_route(archive_dir, clock, client):
+    bot.archive_listings([
+        car('/a', title='Urgent sale', region='Gwarinpa', price='3m'),
+        car('/b', title='Urgent sale', region='Gwarinpa', price='9m'),
+    ], [], 'ds1', clock=clock)
+
+    response = client.get('/archive/query?district=Gwarinpa&distress=1&max_price=5000000&columns=url,price')
+    assert response.status_code == 200
+    assert response.json == {'count': 1, 'results': [{'url': '/a', 'price': 3_000_000.0}]}
+
+
+@pytest.mark.parametrize('query', [
+    'max_price=5m',
+    'limit=-1',
+    'days=abc',
+    'distress=maybe',
+    'columns=url,nope',
+])
+def test_archive_query_route_rejects_bad_parameters(archive_dir, client, query):
+    response = client.get(f'/archive/query?{query}')
+    assert response.status_code == 400
+    assert response.json['status'] == 'error'
+
+
+def test_archive_query_route_when_disabled(client, monkeypatch):
+    monkeypatch.setattr(bot, 'ARCHIVE_AVAILABLE', False)
+    response = client.get('/archive/query?district=Gwarinpa')
+    assert response.status_code == 503
+    assert response.json['status'] == 'disabled'
+
+
+def test_archive_stats_route(archive_dir, clock, client):
+    bot.archive_listings([car('/a')], [], 'ds1', clock=clock)
+    response = client.get('/archive/stats')
+    assert response.status_code == 200
+    assert response.json['rows'] == 1
@@ -0,0 +1,195 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import simple_bot as bot
+
+
+class FakeDataset:
+    """Stands in for send_car_update - a pool of unsent cars that drains as we send"""
+
+    def __init__(self, pool=0, total=100, abuja=50):
+        self.pool = pool
+        self.total = total
+        self.abuja = abuja
+        self.calls = 0
+        self.retry_after = None
+        self.fetch_fails = False
+
+    def __call__(self, pick_batch_size, clock=None, limiter=None):
+        self.calls += 1
+        unsent = self.pool
+        if self.fetch_fails:
+            return {'status': 'fetch_failed', 'sent': 0, 'skipped': 0, 'unsent': 0, 'remaining': 0,
+                    'total': 0, 'abuja': 0}
+        if self.retry_after:
+            limiter.record_retry_after(self.retry_after)
+            return {'status': 'sent', 'sent': 0, 'skipped': 0, 'unsent': unsent, 'remaining': unsent,
+                    'total': self.total, 'abuja': self.abuja}
+        if not unsent:
+            return {'status': 'complete', 'sent': 0, 'skipped': 0, 'unsent': 0, 'remaining': 0,
+                    'total': self.total, 'abuja': self.abuja}
+        sent = min(unsent, pick_batch_size(unsent))
+        for _ in range(0, sent, bot.MAX_CARS_PER_MESSAGE):
+            limiter.record_send()
+        self.pool -= sent
+        return {'status': 'sent', 'sent': sent, 'skipped': 0, 'unsent': unsent, 'remaining': self.pool,
+                'total': self.total, 'abuja': self.abuja}
+
+
+class FakeNotifier:
+    def __init__(self, succeed=True):
+        self.sent = []
+        self.succeed = succeed
+
+    def __call__(self, result, limiter=None):
+        if self.succeed:
+            self.sent.append(result['status'])
+        return self.succeed
+
+
+@pytest.fixture
+def clock():
+    return bot.SimulatedClock(datetime(2026, 1, 1, 12, 0))
+
+
+def make_scheduler(clock, dataset, notifier=None, **kwargs):
+    return bot.AdaptiveScheduler(update=dataset, notify=notifier or FakeNotifier(),
+                                 clock=clock, **kwargs)
+
+
+def run_next(scheduler, clock):
+    """Jump the clock to the next scheduled run and run it"""
+    clock.current = max(clock.current, scheduler.next_run)
+    return scheduler.tick()
+
+
+def test_large_pool_shortens_interval_and_sends_more(clock):
+    dataset = FakeDataset(pool=500)
+    scheduler = make_scheduler(clock, dataset)
+
+    result = scheduler.tick()
+
+    assert result['sent'] == bot.MAX_CARS_PER_MESSAGE * bot.MAX_MESSAGES_PER_UPDATE
+    assert scheduler.interval == timedelta(minutes=bot.MIN_INTERVAL_MINUTES)
+
+
+def test_small_pool_keeps_base_interval(clock):
+    scheduler = make_scheduler(clock, FakeDataset(pool=5))
+
+    result = scheduler.tick()
+
+    assert result['sent'] == 5
+    assert scheduler.interval == timedelta(minutes=bot.BASE_INTERVAL_MINUTES)
+
+
+def test_interval_doubles_up_to_max_when_nothing_changes(clock):
+    scheduler = make_scheduler(clock, FakeDataset(pool=0))
+
+    intervals = []
+    for _ in range(8):
+        run_next(scheduler, clock)
+        intervals.append(scheduler.interval)
+
+    expected = [min(timedelta(minutes=bot.MAX_INTERVAL_MINUTES),
+                    timedelta(minutes=bot.BASE_INTERVAL_MINUTES) * 2 ** i) for i in range(8)]
+    assert intervals == expected
+    assert intervals[-1] == timedelta(minutes=bot.MAX_INTERVAL_MINUTES)
+
+
+def test_complete_notice_sent_once_per_situation(clock):
+    dataset = FakeDataset(pool=0)
+    notifier = FakeNotifier()
+    scheduler = make_scheduler(clock, dataset, notifier)
+
+    for _ in range(3):
+        run_next(scheduler, clock)
+    assert notifier.sent == ['complete']
+
+    # Still the same after the repeat window - remind once more
+    clock.sleep(bot.POOL_EMPTY_NOTICE_HOURS * 3600)
+    run_next(scheduler, clock)
+    assert notifier.sent == ['complete', 'complete']
+
+    # A new dataset that's also fully sent is a new situation
+    dataset.total += 40
+    run_next(scheduler, clock)
+    assert notifier.sent == ['complete', 'complete', 'complete']
+
+
+def test_failed_notice_is_retried(clock):
+    notifier = FakeNotifier(succeed=False)
+    scheduler = make_scheduler(clock, FakeDataset(pool=0), notifier)
+
+    run_next(scheduler, clock)
+    assert scheduler.last_notice is None
+
+    notifier.succeed = True
+    run_next(scheduler, clock)
+    assert notifier.sent == ['complete']
+
+
+def test_quiet_hours_defer_next_run(clock):
+    clock.current = datetime(2026, 1, 1, 22, 50)
+    dataset = FakeDataset(pool=500)
+    scheduler = make_scheduler(clock, dataset, quiet_hours=(23, 6))
+
+    scheduler.tick()
+    assert scheduler.next_run == datetime(2026, 1, 2, 6, 0)
+
+    # A tick inside quiet hours does nothing but wait for the end
+    clock.current = datetime(2026, 1, 2, 1, 0)
+    assert scheduler.tick() is None
+    assert dataset.calls == 1
+    assert scheduler.next_run == datetime(2026, 1, 2, 6, 0)
+
+
+def test_quiet_hours_use_their_own_timezone():
+    # 22:30 UTC is 23:30 in Abuja (UTC+1)
+    clock = bot.SimulatedClock(datetime(2026, 1, 1, 22, 30, tzinfo=timezone.utc))
+    wat = timezone(timedelta(hours=1))
+    dataset = FakeDataset(pool=500)
+    scheduler = make_scheduler(clock, dataset, quiet_hours=(23, 6), quiet_hours_tz=wat)
+
+    assert scheduler.tick() is None
+    assert dataset.calls == 0
+    assert scheduler.next_run == datetime(2026, 1, 2, 5, 0, tzinfo=timezone.utc)
+
+
+def test_rate_limit_defers_without_backing_off(clock):
+    dataset = FakeDataset(pool=100)
+    dataset.retry_after = 600
+    scheduler = make_scheduler(clock, dataset)
+
+    scheduler.tick()
+
+    assert scheduler.next_run == clock.now() + timedelta(seconds=600)
+    assert scheduler.pick_batch_size(100) == 0
+
+    # Once Telegram lets us send again, work continues at full speed
+    dataset.retry_after = None
+    result = run_next(scheduler, clock)
+    assert result['sent'] == bot.MAX_CARS_PER_MESSAGE * bot.MAX_MESSAGES_PER_UPDATE
+
+
+def test_scheduler_builds_limiter_on_its_own_clock(clock):
+    scheduler = make_scheduler(clock, FakeDataset())
+
+    assert scheduler.limiter is not bot.telegram_limiter
+    assert scheduler.limiter.clock is clock
+
+
+def test_failed_fetch_does_not_count_pool_as_new_arrivals(clock):
+    dataset = FakeDataset(pool=100)
+    scheduler = make_scheduler(clock, dataset, FakeNotifier())
+    run_next(scheduler, clock)
+    remaining = dataset.pool
+
+    dataset.fetch_fails = True
+    run_next(scheduler, clock)
+    dataset.fetch_fails = False
+    run_next(scheduler, clock)
+
+    # Same pool as before the failure - nothing new arrived
+    assert dataset.pool < remaining
+    assert scheduler.arrival_rate == 0
@@ -0,0 +1,174 @@
+import json
+from datetime import datetime, timedelta
+
+import pytest
+import requests
+
+import simple_bot as bot
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, body=None):
+        self.status_code = status_code
+        self.body = body or {'ok': status_code == 200}
+        self.text = json.dumps(self.body)
+
+    def json(self):
+        return self.body
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} error")
+
+
+class FakeTelegram:
+    """Replaces requests.post - answers with the queued status codes, then `default`"""
+
+    def __init__(self, *statuses, default=200, body=None):
+        self.statuses = list(statuses)
+        self.default = default
+        self.body = body
+        self.messages = []
+
+    def __call__(self, url, json=None, **kwargs):
+        self.messages.append(json['text'])
+        status = self.statuses.pop(0) if self.statuses else self.default
+        return FakeResponse(status, self.body)
+
+
+def make_cars(count, title='Toyota Camry'):
+    return [{'url': f'/car-{i}', 'title': f'{title} {i}', 'region_name': 'Gwarinpa, Abuja',
+             'price': '4m'} for i in range(count)]
+
+
+@pytest.fixture
+def clock():
+    return bot.SimulatedClock(datetime(2026, 1, 1, 12, 0))
+
+
+@pytest.fixture
+def limiter(clock):
+    return bot.TelegramRateLimiter(clock)
+
+
+@pytest.fixture
+def dataset(tmp_path, monkeypatch):
+    """Point the bot at temp files and a fake Apify dataset - returns the fetch counter"""
+    monkeypatch.setattr(bot, 'SENT_CARS_FILE', str(tmp_path / 'sent_cars.json'))
+    monkeypatch.setattr(bot, 'ARCHIVE_DIR', str(tmp_path / 'listing_archive'))
+    monkeypatch.setattr(bot, '_archived_urls', {})
+    fetches = {'count': 0, 'cars': make_cars(20)}
+
+    def fetch():
+        fetches['count'] += 1
+        return [dict(car) for car in fetches['cars']]
+
+    monkeypatch.setattr(bot, 'fetch_all_cars_from_dataset', fetch)
+    return fetches
+
+
+@pytest.fixture
+def telegram(monkeypatch):
+    fake = FakeTelegram()
+    monkeypatch.setattr(bot.requests, 'post', fake)
+    return fake
+
+
+def listings_in(message):
+    return message.count('[View Listing on Jiji]')
+
+
+def test_batch_is_split_into_messages(dataset, telegram, clock, limiter):
+    result = bot.send_car_update(lambda unsent: 24, clock=clock, limiter=limiter)
+
+    assert [listings_in(message) for message in telegram.messages] == [8, 8, 4]
+    assert result['sent'] == 20 and result['remaining'] == 0
+    assert len(bot.load_sent_cars()) == 20
+    # A second's pause between messages, on the injected clock
+    assert clock.now() == datetime(2026, 1, 1, 12, 0, 2)
+
+
+def test_cars_marked_sent_only_after_telegram_accepts(dataset, telegram, clock, limiter):
+    telegram.statuses = [200, 500]
+
+    result = bot.send_car_update(lambda unsent: 24, clock=clock, limiter=limiter)
+
+    # Second message failed - stop there, third isn't attempted
+    assert len(telegram.messages) == 2
+    assert result['sent'] == 8 and result['remaining'] == 12
+    assert bot.load_sent_cars() == {f'/car-{i}' for i in range(8)}
+
+
+def test_rejected_chunk_is_skipped_not_retried(dataset, telegram, clock, limiter):
+    telegram.statuses = [400, 200]
+
+    result = bot.send_car_update(lambda unsent: 16, clock=clock, limiter=limiter)
+
+    assert result['sent'] == 8 and result['skipped'] == 8 and result['remaining'] == 4
+    assert len(bot.load_sent_cars()) == 16
+
+
+def test_markdown_in_titles_is_escaped(dataset, telegram, clock, limiter):
+    dataset['cars'] = make_cars(1, title='Camry_2015 *clean* [urgent]')
+
+    bot.send_car_update(clock=clock, limiter=limiter)
+
+    assert r'Camry\_2015 \*clean\* \[urgent]' in telegram.messages[0]
+
+
+def test_send_telegram_message_reads_retry_after(telegram, clock, limiter):
+    telegram.default = 429
+    telegram.body = {'ok': False, 'error_code': 429, 'parameters': {'retry_after': 30}}
+
+    assert bot.send_telegram_message("hi", limiter=limiter) is False
+    assert limiter.headroom() == 0
+    assert limiter.wait_seconds() == 30
+
+    clock.sleep(30)
+    assert limiter.headroom() == limiter.max_per_minute
+
+
+def test_rate_limited_batch_leaves_cars_unsent(dataset, telegram, clock, limiter):
+    telegram.default = 429
+    telegram.body = {'ok': False, 'parameters': {'retry_after': 30}}
+
+    result = bot.send_car_update(lambda unsent: 24, clock=clock, limiter=limiter)
+
+    assert len(telegram.messages) == 1
+    assert result['sent'] == 0 and result['remaining'] == 20
+    assert bot.load_sent_cars() == set()
+
+
+def run_for(scheduler, clock, duration):
+    end = clock.now() + duration
+    while clock.now() < end:
+        if clock.now() >= scheduler.next_run:
+            scheduler.tick()
+        clock.sleep(min(max((scheduler.next_run - clock.now()).total_seconds(), 1), 60))
+
+
+def test_telegram_rejecting_everything_does_not_loop(dataset, telegram, clock):
+    telegram.default = 400
+    scheduler = bot.AdaptiveScheduler(clock=clock)
+
+    run_for(scheduler, clock, timedelta(hours=1))
+
+    # Rejected cars are skipped, the pool drains and checks slow down
+    assert dataset['count'] <= 3
+    assert len(bot.load_sent_cars()) == 20
+    assert scheduler.interval >= timedelta(minutes=bot.BASE_INTERVAL_MINUTES)
+
+
+def test_telegram_down_backs_off(dataset, telegram, clock):
+    telegram.default = 500
+    scheduler = bot.AdaptiveScheduler(clock=clock)
+
+    intervals = []
+    for _ in range(4):
+        clock.current = max(clock.current, scheduler.next_run)
+        scheduler.tick()
+        intervals.append(scheduler.interval)
+
+    assert bot.load_sent_cars() == set()
+    assert intervals == sorted(intervals) and intervals[-1] > intervals[0]
+    assert intervals[0] >= timedelta(minutes=bot.BASE_INTERVAL_MINUTES)